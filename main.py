@@ -59,6 +59,11 @@ def setup_logging():
     return logger
 
 
+def _base_name_from_url(url: str):
+    """Базовое имя файла из URL (для заполнения base_name в БД)"""
+    return version_detector.parse_file_url(url)['base_name']
+
+
 def init_database_with_health_check():
     """
     Инициализировать БД с проверкой здоровья и автоматической миграцией.
@@ -78,6 +83,10 @@ def init_database_with_health_check():
         logger.error("❌ Не удалось инициализировать базу данных")
         return False
 
+    # Заполнить пустые base_name один раз при старте, а не при каждом поиске обновлений
+    db.backfill_tracked_base_names(_base_name_from_url)
+    db.backfill_discovered_base_names(_base_name_from_url)
+
     # Комплексная проверка здоровья БД
     health = db.health_check()
 
@@ -4,7 +4,7 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from sqlalchemy import (
     create_engine,
@@ -26,6 +26,9 @@ logger = logging.getLogger(__name__)
 # Базовый класс для моделей
 Base = declarative_base()
 
+# Значение base_name для URL, из которых имя файла не извлекается (отличает их от NULL — «ещё не заполнено»)
+UNPARSEABLE_BASE_NAME = ''
+
 
 class TrackedFile(Base):
     """Модель отслеживаемого файла"""
@@ -150,6 +153,7 @@ class DiscoveredFile(Base):
     pattern_matched = Column(String(100))  # Какой паттерн совпал
     source_page = Column(String(500))  # С какой страницы обнаружен
     suggested_category = Column(String(50))  # Предложенная категория
+    base_name = Column(String(200), index=True)  # Базовое имя без версии (для JOIN с files)
     
     def __repr__(self):
         return f"<DiscoveredFile(id={self.id}, url='{self.url}', category='{self.suggested_category}')>"
@@ -303,6 +307,22 @@ class BlockCatalogChange(Base):
         return f"<BlockCatalogChange(block_id='{self.block_id}', type='{self.change_type}')>"
 
 
+def _parse_file_url(url: str):
+    """
+    Разобрать URL файла через version_detector
+    
+    Импорт выполняется при вызове: version_detector сам импортирует этот модуль.
+    
+    Args:
+        url: URL файла
+        
+    Returns:
+        Словарь с ключами base_name, version, file_type, domain
+    """
+    from src.version_detector import detector
+    return detector.parse_file_url(url)
+
+
 class Database:
     """Класс для работы с базой данных"""
     
@@ -450,6 +470,20 @@ class Database:
 
             inspector = inspect(self.engine)
 
+            # Колонка base_name в discovered_files (для поиска обновлений на стороне БД)
+            if 'discovered_files' in inspector.get_table_names():
+                discovered_columns = [col['name'] for col in inspector.get_columns('discovered_files')]
+                if 'base_name' not in discovered_columns:
+                    logger.info("📝 Добавление колонки discovered_files.base_name")
+                    with self.get_session() as session:
+                        session.execute(text("ALTER TABLE discovered_files ADD COLUMN base_name VARCHAR(200)"))
+                        session.execute(text(
+                            "CREATE INDEX IF NOT EXISTS ix_discovered_files_base_name "
+                            "ON discovered_files (base_name)"
+                        ))
+                        session.commit()
+                    logger.info("   ✓ base_name добавлено")
+
             # Проверить таблицу announcements
             if 'announcements' not in inspector.get_table_names():
                 logger.info("✅ Таблица announcements еще не создана, миграция не требуется")
@@ -582,8 +616,12 @@ class Database:
                     tracked_file.category = category
                     tracked_file.priority = priority
                     tracked_file.domain = domain
+                    if tracked_file.base_name is None:
+                        tracked_file.base_name = _parse_file_url(url)['base_name']
                 else:
-                    # Создать новый
+                    # Создать новый (base_name и version сразу, чтобы файл участвовал
+                    # в поиске обновлений по JOIN без ожидания backfill при старте)
+                    parsed_url = _parse_file_url(url)
                     tracked_file = TrackedFile(
                         url=url,
                         file_type=file_type,
@@ -593,7 +631,9 @@ class Database:
                         last_checked=datetime.utcnow(),
                         category=category,
                         priority=priority,
-                        domain=domain
+                        domain=domain,
+                        base_name=parsed_url['base_name'],
+                        version=parsed_url['version']
                     )
                     session.add(tracked_file)
 
@@ -718,7 +758,8 @@ class Database:
     
     def save_discovered_file(self, url: str, source_page: str, 
                            pattern_matched: str = None, 
-                           suggested_category: str = None) -> DiscoveredFile:
+                           suggested_category: str = None,
+                           base_name: str = None) -> DiscoveredFile:
         """
         Сохранить обнаруженный новый файл
         
@@ -727,6 +768,7 @@ class Database:
             source_page: Страница, на которой файл был обнаружен
             pattern_matched: Паттерн, который совпал
             suggested_category: Предложенная категория
+            base_name: Базовое имя файла без версии
             
         Returns:
             DiscoveredFile объект
@@ -745,7 +787,8 @@ class Database:
                 url=url,
                 source_page=source_page,
                 pattern_matched=pattern_matched,
-                suggested_category=suggested_category
+                suggested_category=suggested_category,
+                base_name=base_name
             )
             session.add(discovered)
             session.commit()
@@ -767,6 +810,103 @@ class Database:
                 DiscoveredFile.added_to_tracking == 0
             ).all()
     
+    def find_version_update_candidates(self) -> List[tuple]:
+        """
+        Найти пары (отслеживаемый файл, обнаруженный файл) с одинаковым base_name
+        
+        JOIN выполняется в БД по индексам base_name, поэтому в Python попадают
+        только строки-кандидаты, а не все отслеживаемые и обнаруженные файлы.
+        Одному обнаруженному файлу может соответствовать несколько строк
+        (js и css с общим base_name, несколько активных версий) — выбор
+        делает вызывающий код; строки упорядочены по id обнаруженного и
+        отслеживаемого файла.
+        
+        Returns:
+            Список строк (base_name, file_type, version, url, priority, category, new_url)
+        """
+        with self.SessionLocal() as session:
+            return session.query(
+                TrackedFile.base_name,
+                TrackedFile.file_type,
+                TrackedFile.version,
+                TrackedFile.url,
+                TrackedFile.priority,
+                TrackedFile.category,
+                DiscoveredFile.url.label('new_url'),
+            ).join(
+                DiscoveredFile, DiscoveredFile.base_name == TrackedFile.base_name
+            ).filter(
+                TrackedFile.base_name != UNPARSEABLE_BASE_NAME,
+                TrackedFile.is_active == 1,
+                DiscoveredFile.added_to_tracking == 0
+            ).order_by(
+                DiscoveredFile.id, TrackedFile.id
+            ).all()
+    
+    def backfill_discovered_base_names(self, base_name_of: Callable[[str], Optional[str]]) -> int:
+        """
+        Заполнить base_name у обнаруженных файлов, сохранённых до появления колонки
+        
+        Args:
+            base_name_of: Функция, извлекающая базовое имя из URL
+            
+        Returns:
+            Количество обновлённых записей
+        """
+        return self._backfill_base_names(DiscoveredFile, base_name_of)
+    
+    def backfill_tracked_base_names(self, base_name_of: Callable[[str], Optional[str]]) -> int:
+        """
+        Заполнить base_name у отслеживаемых файлов, где оно не установлено
+        
+        Args:
+            base_name_of: Функция, извлекающая базовое имя из URL
+            
+        Returns:
+            Количество обновлённых записей
+        """
+        return self._backfill_base_names(TrackedFile, base_name_of)
+    
+    def _backfill_base_names(self, model, base_name_of: Callable[[str], Optional[str]]) -> int:
+        """
+        Заполнить пустые base_name пакетным UPDATE (bulk_update_mappings, executemany)
+        
+        Args:
+            model: Модель с колонками id, url и base_name
+            base_name_of: Функция, извлекающая базовое имя из URL
+            
+        Returns:
+            Количество обновлённых записей
+        """
+        table = model.__tablename__
+        session = self.get_session()
+        try:
+            # Дешёвая проверка: в большинстве запусков заполнять нечего
+            if session.query(model.id).filter(model.base_name.is_(None)).first() is None:
+                return 0
+            
+            rows = session.query(model.id, model.url).filter(
+                model.base_name.is_(None)
+            ).all()
+            # Для URL без распознаваемого имени пишется '' (UNPARSEABLE_BASE_NAME):
+            # иначе строка осталась бы NULL и проверка выше срабатывала бы при каждом запуске
+            mappings = [
+                {'id': row.id, 'base_name': base_name_of(row.url) or UNPARSEABLE_BASE_NAME}
+                for row in rows
+            ]
+            if mappings:
+                session.bulk_update_mappings(model, mappings)
+                session.commit()
+                logger.info(f"Заполнено base_name в {table}: {len(mappings)}")
+            return len(mappings)
+            
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка при заполнении base_name в {table}: {e}", exc_info=True)
+            return 0
+        finally:
+            session.close()
+    
     def mark_discovered_as_tracked(self, discovered_id: int):
         """Отметить обнаруженный файл как добавленный в отслеживание"""
         session = self.get_session()
@@ -794,7 +934,7 @@ class Database:
         with self.SessionLocal() as session:
             return session.query(TrackedFile).filter(
                 TrackedFile.is_active == 1
-            ).all()
+            ).order_by(TrackedFile.id).all()
     
     def get_file_by_base_name(self, base_name: str) -> Optional[TrackedFile]:
         """Получить активный файл по базовому имени"""
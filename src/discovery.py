@@ -289,7 +289,8 @@ class FileDiscovery:
                 url=file_info['url'],
                 source_page=file_info['source_page'],
                 pattern_matched=file_info.get('pattern_matched'),
-                suggested_category=file_info['category']
+                suggested_category=file_info['category'],
+                base_name=detector.parse_file_url(file_info['url'])['base_name']
             )
         except Exception as e:
             logger.error(f"Ошибка при сохранении обнаруженного файла {file_info['url']}: {e}")
@@ -415,18 +416,8 @@ class FileDiscovery:
         """
         logger.info("🔍 Поиск обновлений версий...")
         
-        # Получить отслеживаемые файлы
-        tracked_files = db.get_active_tracked_files()
-        
-        # Получить обнаруженные файлы
-        discovered_files = db.get_undiscovered_files()
-        
-        if not discovered_files:
-            logger.info("📭 Нет обнаруженных файлов для анализа")
-            return []
-        
-        # Использовать version_detector для поиска обновлений
-        updates = detector.find_version_updates(tracked_files, discovered_files)
+        # Сопоставление отслеживаемых и обнаруженных файлов выполняется в БД
+        updates = detector.find_version_updates_in_db()
         
         if updates:
             logger.info(f"🆕 Найдено обновлений версий: {len(updates)}")
@@ -11,7 +11,7 @@ import requests
 
 import config
 from src.database import db, TrackedFile, FileVersion, VersionAlert
-from src.version_detector import detector
+from src.version_detector import detector, PRIORITY_ORDER
 
 logger = logging.getLogger(__name__)
 
@@ -327,10 +327,9 @@ class MigrationManager:
         logger.info(f"{'='*80}\n")
 
         # Сортировка по приоритету
-        priority_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
         sorted_updates = sorted(
             updates,
-            key=lambda x: priority_order.get(x.get('priority', 'MEDIUM'), 99)
+            key=lambda x: PRIORITY_ORDER.get(x.get('priority', 'MEDIUM'), 99)
         )
 
         for i, update in enumerate(sorted_updates, 1):
@@ -1,13 +1,49 @@
 """
 Модуль для отправки уведомлений в Telegram (опционально)
 """
+import html
+import json
 import logging
-from typing import List, Dict, Optional
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+import requests
+from requests.adapters import HTTPAdapter
+
 logger = logging.getLogger(__name__)
 
 
+# Заголовок Content-Type для заранее сериализованного тела sendMessage
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Трейсбек ошибки отправки пишется в лог раз в столько ошибок
+SEND_ERROR_TRACEBACK_EVERY = 20
+
+# Сколько секунд считать успешную проверку test_connection актуальной
+CONNECTION_CHECK_TTL = 600.0
+
+# Максимальная пауза при 429 от Telegram (секунды)
+MAX_RETRY_AFTER = 30
+
+# Повторы sendMessage: число попыток и экспоненциальная пауза при сбое соединения
+SEND_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+
+# Глобальный лимит Bot API на бота (сообщений в секунду, он же объём bucket'а)
+BOT_MAX_RPS = 30.0
+
+# Общий для всех экземпляров пул соединений к api.telegram.org
+# (повторы выполняет сам notifier, поэтому max_retries=0)
+SHARED_HTTP_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=0)
+
 # Emoji для разных приоритетов
 PRIORITY_EMOJI = {
     "CRITICAL": "🔴",
@@ -26,31 +62,271 @@ CATEGORY_EMOJI = {
     "utilities": "🔧"
 }
 
+# Связанные методы .get для поиска emoji без обращения к атрибуту на каждый вызов
+get_priority_emoji = PRIORITY_EMOJI.get
+get_category_emoji = CATEGORY_EMOJI.get
+
+# Известные приоритеты (прочие значения в дайджесте считаются MEDIUM)
+VALID_PRIORITIES = frozenset(PRIORITY_EMOJI)
+
+# Мягкий лимит длины дайджеста: дальше записи не добавляются (жёсткий лимит Telegram — 4096)
+DIGEST_SOFT_LIMIT = 3500
+
+# Подробные секции дайджеста: (приоритет, заголовок, показывать влияние)
+DIGEST_DETAILED_SECTIONS = (
+    ("CRITICAL", "🔴 <b>КРИТИЧЕСКИЕ</b>", True),
+    ("HIGH", "🟡 <b>ВАЖНЫЕ</b>", False),
+)
 
+# Токен бота в URL Telegram API (bot<ID>:<SECRET>/)
+BOT_TOKEN_RE = re.compile(r'bot\d+:[A-Za-z0-9_-]+/')
+
+# Строка «👥 влияние» в дайджесте (вместе с отступом и переводом строки)
+IMPACT_LINE_RE = re.compile(r'^[^\S\n]*👥[^\n]*\n?', re.MULTILINE)
+
+# HTML-тег разметки Telegram (<b>, </code> и т.п.)
+HTML_TAG_RE = re.compile(r'</?[a-zA-Z][^<>]*>')
+
+# Таблица для экранирования HTML за один проход str.translate
+HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+@lru_cache(maxsize=4096)
 def sanitize_url_for_logging(url: str) -> str:
     """Удалить токены из URL перед логированием"""
-    import re
     # Заменить bot<TOKEN>/method на bot***HIDDEN***/method
-    return re.sub(r'bot\d+:[A-Za-z0-9_-]+/', 'bot***HIDDEN***/', url)
+    return BOT_TOKEN_RE.sub('bot***HIDDEN***/', url)
 
 
+@lru_cache(maxsize=4096)
 def escape_html(text: str) -> str:
     """
     Экранировать HTML-символы для Telegram HTML parse_mode.
     Экранирует только &, <, > — этого достаточно для безопасной отправки
     любого текста (LLM-описания, URL, технические строки с _ * ` и т.д.).
+    Результат кэшируется: категории, имена файлов и типовые фразы LLM повторяются.
     """
-    if not text:
+    # Большинство строк не содержит спецсимволов — возвращаем их без копирования
+    if not text or ('&' not in text and '<' not in text and '>' not in text):
         return text
-    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text.translate(HTML_ESCAPE_TABLE)
+
+
+@lru_cache(maxsize=16)
+def _format_minute(fmt: str, minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60).strftime(fmt)
+
+
+def format_now(fmt: str) -> str:
+    """
+    Текущее время в формате fmt с точностью до минуты
+
+    Строка для каждого формата вычисляется один раз в минуту —
+    при пакетной отправке strftime не вызывается на каждое сообщение.
+    """
+    return _format_minute(fmt, int(time.time()) // 60)
+
+
+def extract_filename(title: str) -> str:
+    """Извлечь имя файла из заголовка анонса ("file.js - описание" или путь)"""
+    head, sep, _ = title.partition(' - ')
+    return head if sep else title.rpartition('/')[2]
+
+
+@lru_cache(maxsize=2048)
+def smart_truncate(text: str, max_len: int) -> str:
+    """Обрезка по границе слова (кэшируется: имена файлов и описания повторяются)"""
+    if not text or len(text) <= max_len:
+        return text or ''
+    truncated = text[:max_len]
+    # Найти последний пробел
+    last_space = truncated.rfind(' ')
+    if last_space > max_len * 0.6:
+        truncated = truncated[:last_space]
+    return truncated.rstrip('.,;: ') + '...'
+
+
+def html_to_plain_text(text: str) -> str:
+    """Убрать HTML-теги и раскрыть сущности (для отправки без parse_mode)"""
+    return html.unescape(HTML_TAG_RE.sub('', text))
+
+
+class HtmlTemplateFields(dict):
+    """
+    Поля для str.format_map: значения экранируются escape_html при подстановке,
+    отсутствующие ключи берутся из defaults (ключ без значения по умолчанию — KeyError)
+    """
+
+    def __init__(self, data: Dict, defaults: Dict):
+        super().__init__(data)
+        self.defaults = defaults
+
+    def __missing__(self, key):
+        if key in self.defaults:
+            return self.defaults[key]
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        return escape_html(str(super().__getitem__(key)))
+
+
+# Шаблоны сообщений (заполняются через str.format_map(HtmlTemplateFields(...)))
+ANNOUNCEMENT_TEMPLATE = """🔔 <b>Обновление Tilda</b> | {now}
+
+{priority_emoji} <b>{severity}</b>
+
+{category_emoji} <b>{category_upper}</b>
+• {title}
+
+📝 <b>Описание:</b>
+{description}
+
+👥 <b>Влияние:</b>
+{user_impact}
+
+💡 <b>Рекомендации:</b>
+{recommendations}
+
+━━━━━━━━━━━━━━━━
+🔗 Файл: <code>{url}</code>
+"""
+
+ANNOUNCEMENT_DEFAULTS = {
+    'severity': 'НЕЗНАЧИТЕЛЬНОЕ',
+    'title': 'Без заголовка',
+    'description': 'Нет описания',
+    'user_impact': 'Не указано',
+    'recommendations': 'Действий не требуется',
+    'url': 'N/A',
+}
+
+VERSION_ALERT_TEMPLATE = """🆕 <b>НОВАЯ ВЕРСИЯ ОБНАРУЖЕНА</b>
+
+📦 Файл: <code>{base_name}</code>
+{category_emoji} Категория: <b>{category_upper}</b> ({priority_emoji} {priority})
+
+Текущая версия: {current_version}
+Новая версия: <b>{new_version}</b> ✨
+
+⚙️ Статус миграции: {migration_status}
+⏱ Обнаружено: {now}
+
+━━━━━━━━━━━━━━━━
+🔗 Старый URL:
+<code>{current_url}</code>
+
+🔗 Новый URL:
+<code>{new_url}</code>
+"""
+
+VERSION_ALERT_DEFAULTS = {
+    'priority': 'MEDIUM',
+    'current_version': 'unknown',
+    'migration_status': 'Автоматическая миграция запущена...',
+    'current_url': 'N/A',
+}
+
+MIGRATION_SUCCESS_TEMPLATE = """✅ <b>МИГРАЦИЯ ЗАВЕРШЕНА</b>
+
+📦 Файл: <code>{base_name}</code>
+{category_emoji} Категория: <b>{category_upper}</b>
+
+{old_version} → <b>{new_version}</b>
+
+⏱ Время миграции: {migration_time}с
+✅ Статус: Активна и отслеживается
+
+━━━━━━━━━━━━━━━━
+📝 Файл автоматически обновлен и добавлен в мониторинг
+"""
+
+MIGRATION_FAILURE_TEMPLATE = """❌ <b>МИГРАЦИЯ НЕ УДАЛАСЬ</b>
+
+📦 Файл: <code>{base_name}</code>
+{category_emoji} Категория: <b>{category_upper}</b>
+
+{old_version} → {new_version}
+
+❌ Ошибка: {error}
+🔙 Действие: Откат к предыдущей версии
+
+━━━━━━━━━━━━━━━━
+⚠️ Требуется ручная проверка!
+"""
+
+MIGRATION_DEFAULTS = {
+    'old_version': 'unknown',
+    'error': 'Unknown error',
+}
+
+FILE_404_TEMPLATE = """⚠️ <b>КРИТИЧЕСКАЯ ОШИБКА 404</b>
+
+📦 Файл: <code>{base_name}</code>
+{category_emoji} Категория: <b>{category_upper}</b> ({priority_emoji} {priority})
+
+🔗 URL:
+<code>{url}</code>
+
+⚠️ Последовательных 404: <b>{consecutive_count}</b>
+🔍 Действие: Запущен Discovery Mode для поиска замены
+
+⏱ Время: {now}
+
+━━━━━━━━━━━━━━━━
+🚨 Файл может быть удален или переименован Tilda!
+"""
+
+FILE_404_DEFAULTS = {
+    'priority': 'MEDIUM',
+    'consecutive_count': 0,
+}
+
+DISCOVERY_REPORT_HEADER = """🔍 <b>Discovery Mode Report</b> | {now}
+
+Обнаружено новых файлов: <b>{count}</b>
+
+"""
+
+DISCOVERY_REPORT_FOOTER = """━━━━━━━━━━━━━━━━
+⚠️ Требуется ручная проверка и добавление в мониторинг
+"""
+
+# Имя шаблона -> (шаблон, значения по умолчанию)
+MESSAGE_TEMPLATES = {
+    'announcement': (ANNOUNCEMENT_TEMPLATE, ANNOUNCEMENT_DEFAULTS),
+    'version_alert': (VERSION_ALERT_TEMPLATE, VERSION_ALERT_DEFAULTS),
+    'migration_success': (MIGRATION_SUCCESS_TEMPLATE, MIGRATION_DEFAULTS),
+    'migration_failure': (MIGRATION_FAILURE_TEMPLATE, MIGRATION_DEFAULTS),
+    '404_critical': (FILE_404_TEMPLATE, FILE_404_DEFAULTS),
+}
+
+
+def render_template(name: str, fields: Dict) -> str:
+    """
+    Заполнить шаблон сообщения из MESSAGE_TEMPLATES
+
+    Args:
+        name: Имя шаблона из MESSAGE_TEMPLATES
+        fields: Значения полей (неэкранированные)
+
+    Returns:
+        Отформатированное сообщение
+    """
+    template, defaults = MESSAGE_TEMPLATES[name]
+    return template.format_map(HtmlTemplateFields(fields, defaults))
 
 
 class TelegramNotifier:
     """Класс для отправки уведомлений в Telegram"""
 
+    # Token bucket'ы, общие для всех экземпляров: ключ -> (токены, момент пополнения)
+    _BUCKETS: Dict[tuple, Tuple[float, float]] = {}
+    _BUCKETS_LOCK = threading.Lock()
+
     def __init__(self, bot_token: str = None, chat_id: str = None,
                  thread_id: int = None, alerts_thread_id: int = None,
-                 digest_thread_id: int = None, discovery_thread_id: int = None):
+                 digest_thread_id: int = None, discovery_thread_id: int = None,
+                 per_chat_rps: float = 1.0):
         """
         Инициализация Telegram бота
 
@@ -61,13 +337,18 @@ class TelegramNotifier:
             alerts_thread_id: ID топика для алертов (опционально)
             digest_thread_id: ID топика для дайджестов (опционально)
             discovery_thread_id: ID топика для Discovery отчетов (опционально)
+            per_chat_rps: Лимит сообщений в секунду в один чат
         """
+        if per_chat_rps <= 0:
+            raise ValueError(f"per_chat_rps должен быть положительным, получено {per_chat_rps}")
+
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.thread_id = thread_id
         self.alerts_thread_id = alerts_thread_id
         self.digest_thread_id = digest_thread_id
         self.discovery_thread_id = discovery_thread_id
+        self.per_chat_rps = per_chat_rps
         self.enabled = bool(bot_token and chat_id)
 
         # Проверка: если chat_id не начинается с "-", это личный чат (не группа)
@@ -78,9 +359,47 @@ class TelegramNotifier:
         self.last_response = None
         self.last_error = None
 
+        # Постоянная HTTP-сессия: TCP/TLS соединение с api.telegram.org
+        # переиспользуется между сообщениями и между экземплярами (общий адаптер)
+        self._session = requests.Session()
+        self._session.mount("https://", SHARED_HTTP_ADAPTER)
+        self._send_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+
+        # Кэш JSON-префиксов тела sendMessage по (parse_mode, thread_id):
+        # chat_id и прочие поля неизменны, сериализуется только текст
+        self._payload_prefixes = {}
+
+        # Счётчик ошибок отправки (для редкого логирования трейсбеков)
+        self._send_error_count = 0
+
+        # Момент (time.monotonic) последней успешной проверки test_connection
+        self._last_ok_at = None
+
+        # Момент (time.monotonic), раньше которого нельзя отправлять после 429
+        self._next_send_at = 0.0
+
+        # Таблица форматтеров для _send: вид сообщения -> метод форматирования
+        self._formatters = {
+            'announcement': self._format_announcement,
+            'digest': self._format_digest,
+            'discovery': self._format_discovery_report,
+            'version_alert': self._format_version_alert,
+            'migration_success': self._format_migration_success,
+            'migration_failure': self._format_migration_failure,
+            '404_critical': self._format_404_critical,
+        }
+
         if not self.enabled:
             logger.warning("Telegram уведомления отключены: не указан bot_token или chat_id")
     
+    def close(self):
+        """Закрыть HTTP-сессию, не трогая пул общего адаптера других экземпляров"""
+        # Session.close() закрывает все смонтированные адаптеры, а закрытие
+        # SHARED_HTTP_ADAPTER сбросило бы соединения всех notifier'ов
+        if self._session.adapters.get("https://") is SHARED_HTTP_ADAPTER:
+            del self._session.adapters["https://"]
+        self._session.close()
+
     def send_announcement(self, announcement: Dict) -> bool:
         """
         Отправить анонс в Telegram
@@ -88,6 +407,23 @@ class TelegramNotifier:
         Args:
             announcement: Словарь с анонсом
 
+        Returns:
+            True если успешно отправлено
+        """
+        return self._send('announcement', announcement, thread_id=self.thread_id,
+                          error_label="Ошибка при отправке в Telegram")
+
+    def _send(self, kind: str, data, *, thread_id: Optional[int], error_label: str, **format_kwargs) -> bool:
+        """
+        Общий путь отправки: проверка, форматирование, отправка, логирование ошибки
+
+        Args:
+            kind: Вид сообщения (ключ в self._formatters)
+            data: Данные для форматтера
+            thread_id: ID топика для отправки
+            error_label: Префикс сообщения об ошибке в логе
+            **format_kwargs: Дополнительные аргументы форматтера
+
         Returns:
             True если успешно отправлено
         """
@@ -96,11 +432,24 @@ class TelegramNotifier:
             return False
 
         try:
-            message = self._format_announcement(announcement)
-            return self._send_message(message, thread_id=self.thread_id)
+            message = self._formatters[kind](data, **format_kwargs)
+            return self._send_message(message, thread_id=thread_id)
         except Exception as e:
-            logger.error(f"Ошибка при отправке в Telegram: {e}", exc_info=True)
+            self._log_send_error(error_label, e)
             return False
+
+    def _log_send_error(self, error_label: str, error: Exception):
+        """
+        Залогировать ошибку отправки без трейсбека
+
+        Трейсбек пишется только для первой и каждой SEND_ERROR_TRACEBACK_EVERY-й ошибки,
+        чтобы при недоступности Telegram лог не забивался одинаковыми стеками.
+        """
+        self._send_error_count += 1
+        logger.error("%s: %s: %s", error_label, type(error).__name__, error)
+        if self._send_error_count % SEND_ERROR_TRACEBACK_EVERY == 1:
+            logger.warning("Трейсбек ошибки отправки (всего ошибок: %d)",
+                           self._send_error_count, exc_info=error)
     
     def send_daily_digest(self, announcements: List[Dict], digest_analysis: Dict = None) -> bool:
         """
@@ -113,19 +462,13 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
-        if not announcements:
+        if self.enabled and not announcements:
             logger.info("Нет анонсов для дайджеста")
             return False
 
-        try:
-            message = self._format_digest(announcements, digest_analysis=digest_analysis)
-            return self._send_message(message, thread_id=self.digest_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке дайджеста: {e}", exc_info=True)
-            return False
+        return self._send('digest', announcements, thread_id=self.digest_thread_id,
+                          error_label="Ошибка при отправке дайджеста",
+                          digest_analysis=digest_analysis)
     
     def send_discovery_report(self, discovered_files: List[Dict]) -> bool:
         """
@@ -137,18 +480,11 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
         if not discovered_files:
             return False
 
-        try:
-            message = self._format_discovery_report(discovered_files)
-            return self._send_message(message, thread_id=self.discovery_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке отчета Discovery: {e}", exc_info=True)
-            return False
+        return self._send('discovery', discovered_files, thread_id=self.discovery_thread_id,
+                          error_label="Ошибка при отправке отчета Discovery")
     
     def send_block_catalog_report(self, report: dict) -> bool:
         """
@@ -179,13 +515,11 @@ class TelegramNotifier:
                     success = True
             return success
         except Exception as e:
-            logger.error(f"Ошибка при отправке отчёта о блоках: {e}", exc_info=True)
+            self._log_send_error("Ошибка при отправке отчёта о блоках", e)
             return False
 
     def _format_block_catalog_report(self, report: dict) -> str:
         """Форматировать отчёт об изменениях каталога блоков"""
-        import json as _json
-
         new_blocks = report.get('new_blocks', [])
         removed_blocks = report.get('removed_blocks', [])
         changed_blocks = report.get('changed_blocks', [])
@@ -211,18 +545,8 @@ class TelegramNotifier:
                 old_v = ch.get('old_value', '')
                 new_v = ch.get('new_value', '')
 
-                def _llm_summary(ch):
-                    raw = ch.get('llm_analysis')
-                    if not raw:
-                        return ''
-                    try:
-                        analysis = _json.loads(raw)
-                        return analysis.get('summary', '')[:150]
-                    except Exception:
-                        return ''
-
                 entry = f"  {bd['cod']} — {bd['title']}"
-                summary = _llm_summary(ch)
+                summary = self._llm_summary(ch)
                 if summary:
                     entry += f"\n    {summary}"
 
@@ -257,14 +581,9 @@ class TelegramNotifier:
 
         def _block_entry(b):
             entry = f"  {b['cod']} — {b['title']}"
-            if b.get('llm_analysis'):
-                try:
-                    analysis = _json.loads(b['llm_analysis'])
-                    summary = analysis.get('summary', '')[:150]
-                    if summary:
-                        entry += f"\n    {summary}"
-                except Exception:
-                    pass
+            summary = self._llm_summary(b)
+            if summary:
+                entry += f"\n    {summary}"
             return entry
 
         # 5. Новые бета-блоки
@@ -325,6 +644,28 @@ class TelegramNotifier:
 
         return "\n".join(parts)
 
+    def _llm_summary(self, item: dict) -> str:
+        """
+        Краткая сводка из JSON-поля llm_analysis (до 150 символов)
+
+        Разобранный JSON сохраняется в item['_llm_analysis_parsed'],
+        чтобы повторное форматирование отчёта (превью + отправка) не парсило его снова.
+        """
+        analysis = item.get('_llm_analysis_parsed')
+        if analysis is None:
+            analysis = {}
+            raw = item.get('llm_analysis')
+            if raw:
+                try:
+                    parsed = json.loads(raw)
+                    if isinstance(parsed, dict):
+                        analysis = parsed
+                except Exception:
+                    pass
+            item['_llm_analysis_parsed'] = analysis
+        summary = analysis.get('summary') or ''
+        return summary[:150] if isinstance(summary, str) else ''
+
     def send_version_alert(self, alert_data: Dict) -> bool:
         """
         Отправить алерт о новой версии файла
@@ -335,15 +676,8 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
-        try:
-            message = self._format_version_alert(alert_data)
-            return self._send_message(message, thread_id=self.alerts_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке версионного алерта: {e}", exc_info=True)
-            return False
+        return self._send('version_alert', alert_data, thread_id=self.alerts_thread_id,
+                          error_label="Ошибка при отправке версионного алерта")
     
     def send_migration_success(self, migration_data: Dict) -> bool:
         """
@@ -355,15 +689,8 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
-        try:
-            message = self._format_migration_success(migration_data)
-            return self._send_message(message, thread_id=self.alerts_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке уведомления о миграции: {e}", exc_info=True)
-            return False
+        return self._send('migration_success', migration_data, thread_id=self.alerts_thread_id,
+                          error_label="Ошибка при отправке уведомления о миграции")
     
     def send_migration_failure(self, migration_data: Dict) -> bool:
         """
@@ -375,15 +702,8 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
-        try:
-            message = self._format_migration_failure(migration_data)
-            return self._send_message(message, thread_id=self.alerts_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке уведомления о неудаче: {e}", exc_info=True)
-            return False
+        return self._send('migration_failure', migration_data, thread_id=self.alerts_thread_id,
+                          error_label="Ошибка при отправке уведомления о неудаче")
     
     def send_404_critical(self, file_data: Dict) -> bool:
         """
@@ -395,15 +715,8 @@ class TelegramNotifier:
         Returns:
             True если успешно отправлено
         """
-        if not self.enabled:
-            return False
-
-        try:
-            message = self._format_404_critical(file_data)
-            return self._send_message(message, thread_id=self.alerts_thread_id)
-        except Exception as e:
-            logger.error(f"Ошибка при отправке 404 алерта: {e}", exc_info=True)
-            return False
+        return self._send('404_critical', file_data, thread_id=self.alerts_thread_id,
+                          error_label="Ошибка при отправке 404 алерта")
     
     def _format_announcement(self, announcement: Dict) -> str:
         """
@@ -415,46 +728,24 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        severity = escape_html(announcement.get('severity', 'НЕЗНАЧИТЕЛЬНОЕ'))
-        priority_emoji = PRIORITY_EMOJI.get(announcement.get('priority', 'MEDIUM'), '⚪')
         category = announcement.get('category', 'unknown')
-        category_emoji = CATEGORY_EMOJI.get(category, '📦')
-
-        title = escape_html(announcement.get('title', 'Без заголовка'))
-        description = escape_html(announcement.get('description', 'Нет описания'))
-        user_impact = escape_html(announcement.get('user_impact', 'Не указано'))
-        recommendations = escape_html(announcement.get('recommendations', 'Действий не требуется'))
-        url = escape_html(announcement.get('url', 'N/A'))
-
-        message = f"""🔔 <b>Обновление Tilda</b> | {datetime.now().strftime('%d.%m.%Y %H:%M')}
-
-{priority_emoji} <b>{severity}</b>
-
-{category_emoji} <b>{escape_html(category.upper())}</b>
-• {title}
-
-📝 <b>Описание:</b>
-{description}
-
-👥 <b>Влияние:</b>
-{user_impact}
-
-💡 <b>Рекомендации:</b>
-{recommendations}
-
-━━━━━━━━━━━━━━━━
-🔗 Файл: <code>{url}</code>
-"""
+        parts = [render_template('announcement', {
+            **announcement,
+            'now': format_now('%d.%m.%Y %H:%M'),
+            'priority_emoji': get_priority_emoji(announcement.get('priority', 'MEDIUM'), '⚪'),
+            'category_emoji': get_category_emoji(category, '📦'),
+            'category_upper': category.upper(),
+        })]
 
         # Добавить тренд и фичу если есть
         trend = announcement.get('trend')
         feature = announcement.get('feature')
         if trend:
-            message += f"\n📈 <b>Тренд:</b> {escape_html(trend)}"
+            parts.append(f"\n📈 <b>Тренд:</b> {escape_html(trend)}")
         if feature:
-            message += f"\n🎯 <b>Фича:</b> {escape_html(feature)}"
+            parts.append(f"\n🎯 <b>Фича:</b> {escape_html(feature)}")
 
-        return message
+        return "".join(parts)
     
     def _format_digest(self, announcements: List[Dict], digest_analysis: Dict = None) -> str:
         """
@@ -467,66 +758,80 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        message = f"📋 <b>Дайджест Tilda</b> | {datetime.now().strftime('%d %B %Y')}\n\n"
+        # Части сообщения собираются в список (каждая со своими переводами строк)
+        parts = [f"📋 <b>Дайджест Tilda</b> | {format_now('%d %B %Y')}\n\n"]
 
         # LLM-сводка дня (если доступна)
         if digest_analysis:
             summary = escape_html(digest_analysis.get('summary', ''))
             if summary:
-                message += f"📈 <b>Сводка дня:</b>\n{summary}\n\n"
+                parts.append(f"📈 <b>Сводка дня:</b>\n{summary}\n\n")
 
             attention = escape_html(digest_analysis.get('attention') or '')
             if attention:
-                message += f"⚠️ <b>Обратить внимание:</b> {attention}\n\n"
+                parts.append(f"⚠️ <b>Обратить внимание:</b> {attention}\n\n")
         else:
             # Fallback: механическая сводка по категориям
-            message += self._build_category_summary(announcements)
+            parts.append(self._build_category_summary(announcements))
 
         # Группировка по приоритетам
-        by_priority = {
-            'CRITICAL': [],
-            'HIGH': [],
-            'MEDIUM': [],
-            'LOW': []
-        }
-
+        by_priority = defaultdict(list)
         for ann in announcements:
-            priority = ann.get('priority', 'MEDIUM')
-            if priority in by_priority:
-                by_priority[priority].append(ann)
-            else:
-                by_priority['MEDIUM'].append(ann)
-
-        # CRITICAL
-        if by_priority['CRITICAL']:
-            message += f"🔴 <b>КРИТИЧЕСКИЕ</b> ({len(by_priority['CRITICAL'])})\n"
-            message += self._format_priority_group(by_priority['CRITICAL'], show_impact=True)
-
-        # HIGH
-        if by_priority['HIGH']:
-            message += f"🟡 <b>ВАЖНЫЕ</b> ({len(by_priority['HIGH'])})\n"
-            message += self._format_priority_group(by_priority['HIGH'], show_impact=False)
+            priority = ann.get('priority')
+            by_priority[priority if priority in VALID_PRIORITIES else 'MEDIUM'].append(ann)
+
+        # Бюджет длины: после DIGEST_SOFT_LIMIT символов новые записи не формируются,
+        # вместо них — счётчик скрытых (дешевле, чем собрать всё и потом обрезать)
+        running_len = sum(map(len, parts))
+        hidden = 0
+
+        # CRITICAL и HIGH (подробно, по категориям)
+        for priority, header, show_impact in DIGEST_DETAILED_SECTIONS:
+            group = by_priority[priority]
+            if not group:
+                continue
+            if running_len > DIGEST_SOFT_LIMIT:
+                hidden += len(group)
+                continue
+            group_text, group_hidden = self._format_priority_group(
+                group, show_impact=show_impact, budget=DIGEST_SOFT_LIMIT - running_len
+            )
+            section = f"{header} ({len(group)})\n" + group_text
+            parts.append(section)
+            running_len += len(section)
+            hidden += group_hidden
 
         # MEDIUM + LOW (кратко)
         minor = by_priority['MEDIUM'] + by_priority['LOW']
-        if minor:
-            message += f"🟢 <b>НЕЗНАЧИТЕЛЬНЫЕ</b> ({len(minor)})\n"
+        if minor and running_len > DIGEST_SOFT_LIMIT:
+            hidden += len(minor)
+        elif minor:
+            parts.append(f"🟢 <b>НЕЗНАЧИТЕЛЬНЫЕ</b> ({len(minor)})\n")
             # Группируем файлы через запятую
             filenames = []
-            for ann in minor:
-                category_emoji = CATEGORY_EMOJI.get(ann.get('category', 'unknown'), '📦')
+            for i, ann in enumerate(minor):
+                if running_len > DIGEST_SOFT_LIMIT:
+                    hidden += len(minor) - i
+                    break
+                category_emoji = get_category_emoji(ann.get('category', 'unknown'), '📦')
                 title = ann.get('title', 'Без заголовка')
-                # Извлечь имя файла из заголовка
-                filename = title.split(' - ')[0] if ' - ' in title else title.split('/')[-1]
-                filenames.append(f"{category_emoji} {self._smart_truncate(filename, 40)}")
-            message += "  " + ", ".join(filenames) + "\n"
+                filename = extract_filename(title)
+                entry = f"{category_emoji} {smart_truncate(filename, 40)}"
+                filenames.append(entry)
+                running_len += len(entry) + 2
+            parts.append("  " + ", ".join(filenames) + "\n")
+
+        if hidden:
+            parts.append(f"  ... и ещё {hidden} изменений не показано\n")
 
         # Тренд (из LLM или из данных)
         if digest_analysis and digest_analysis.get('trend'):
-            message += f"\n📈 <b>Тренд:</b> {escape_html(digest_analysis['trend'])}\n"
+            parts.append(f"\n📈 <b>Тренд:</b> {escape_html(digest_analysis['trend'])}\n")
+
+        parts.append("\n━━━━━━━━━━━━━━━━\n")
+        parts.append(f"📊 Всего: {len(announcements)} изменений за 24ч\n")
 
-        message += "\n━━━━━━━━━━━━━━━━\n"
-        message += f"📊 Всего: {len(announcements)} изменений за 24ч\n"
+        message = "".join(parts)
 
         # Сжатие если > 4000 символов (лимит Telegram)
         if len(message) > 4000:
@@ -534,59 +839,63 @@ class TelegramNotifier:
 
         return message
 
-    def _format_priority_group(self, items: List[Dict], show_impact: bool = False) -> str:
-        """Форматировать группу анонсов одного приоритета"""
-        result = ""
+    def _format_priority_group(self, items: List[Dict], show_impact: bool = False,
+                               budget: int = None) -> Tuple[str, int]:
+        """
+        Форматировать группу анонсов одного приоритета
+
+        Args:
+            items: Анонсы группы
+            show_impact: Показывать влияние на пользователей
+            budget: Сколько символов можно занять (None — без ограничения);
+                записи сверх бюджета не формируются
+
+        Returns:
+            Кортеж (текст группы, число не показанных анонсов)
+        """
+        parts = []
+        used = 0
+        hidden = 0
         # Группировка по категориям внутри приоритета
-        by_cat = {}
+        by_cat = defaultdict(list)
         for ann in items:
-            cat = ann.get('category', 'unknown')
-            if cat not in by_cat:
-                by_cat[cat] = []
-            by_cat[cat].append(ann)
+            by_cat[ann.get('category', 'unknown')].append(ann)
 
         for cat, cat_items in by_cat.items():
-            category_emoji = CATEGORY_EMOJI.get(cat, '📦')
-            result += f"  {category_emoji} {cat.upper()}\n"
+            if budget is not None and used > budget:
+                hidden += len(cat_items)
+                continue
+            category_emoji = get_category_emoji(cat, '📦')
+            parts.append(f"  {category_emoji} {cat.upper()}\n")
             for ann in cat_items:
+                if budget is not None and used > budget:
+                    hidden += 1
+                    continue
                 title = ann.get('title', 'Без заголовка')
-                filename = title.split(' - ')[0] if ' - ' in title else title.split('/')[-1]
-                desc = escape_html(ann.get('description', ''))
-                result += f"  • {escape_html(self._smart_truncate(filename, 40))}\n"
+                filename = extract_filename(title)
+                # Сначала обрезаем, потом экранируем: не тратим время на хвост,
+                # который будет отброшен, и не разрезаем HTML-сущности (&amp; и т.п.)
+                desc = ann.get('description', '')
+                entry = f"  • {escape_html(smart_truncate(filename, 40))}\n"
                 if desc:
-                    result += f"    {self._smart_truncate(desc, 120)}\n"
+                    entry += f"    {escape_html(smart_truncate(desc, 120))}\n"
                 if show_impact and ann.get('user_impact'):
-                    impact = escape_html(ann['user_impact'])
-                    result += f"    👥 {self._smart_truncate(impact, 100)}\n"
-            result += "\n"
-        return result
-
-    def _smart_truncate(self, text: str, max_len: int) -> str:
-        """Обрезка по границе слова"""
-        if not text or len(text) <= max_len:
-            return text or ''
-        truncated = text[:max_len]
-        # Найти последний пробел
-        last_space = truncated.rfind(' ')
-        if last_space > max_len * 0.6:
-            truncated = truncated[:last_space]
-        return truncated.rstrip('.,;: ') + '...'
+                    entry += f"    👥 {escape_html(smart_truncate(ann['user_impact'], 100))}\n"
+                parts.append(entry)
+                used += len(entry)
+            parts.append("\n")
+        return "".join(parts), hidden
 
     def _build_category_summary(self, announcements: List[Dict]) -> str:
         """Fallback: механическая сводка по категориям (без LLM)"""
-        by_cat = {}
-        for ann in announcements:
-            cat = ann.get('category', 'unknown')
-            if cat not in by_cat:
-                by_cat[cat] = 0
-            by_cat[cat] += 1
+        by_cat = Counter(ann.get('category', 'unknown') for ann in announcements)
 
         if not by_cat:
             return ""
 
         parts = []
-        for cat, count in sorted(by_cat.items(), key=lambda x: x[1], reverse=True):
-            category_emoji = CATEGORY_EMOJI.get(cat, '📦')
+        for cat, count in by_cat.most_common():
+            category_emoji = get_category_emoji(cat, '📦')
             parts.append(f"{category_emoji} {cat} ({count})")
 
         return f"📈 <b>Обзор:</b> Изменения в {', '.join(parts)}\n\n"
@@ -596,15 +905,8 @@ class TelegramNotifier:
         if len(message) <= 4000:
             return message
 
-        # Стратегия: убрать user_impact строки
-        lines = message.split('\n')
-        compressed = []
-        for line in lines:
-            if line.strip().startswith('👥'):
-                continue
-            compressed.append(line)
-
-        result = '\n'.join(compressed)
+        # Стратегия: убрать user_impact строки (один проход regex)
+        result = IMPACT_LINE_RE.sub('', message)
 
         # Если всё ещё длинный — обрезаем описания
         if len(result) > 4000:
@@ -622,38 +924,33 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        message = f"""🔍 <b>Discovery Mode Report</b> | {datetime.now().strftime('%d.%m.%Y')}
-
-Обнаружено новых файлов: <b>{len(discovered_files)}</b>
-
-"""
+        parts = [DISCOVERY_REPORT_HEADER.format(now=format_now('%d.%m.%Y'), count=len(discovered_files))]
 
         # Группировка по категориям
-        by_category = {}
+        by_category = defaultdict(list)
         for file_info in discovered_files:
-            cat = file_info.get('category', 'unknown')
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(file_info)
-
-        # Вывод по категориям
-        for category, files in sorted(by_category.items()):
-            category_emoji = CATEGORY_EMOJI.get(category, '📦')
-            message += f"{category_emoji} <b>{category.upper()}</b> ({len(files)} файлов)\n"
-
-            for file_info in files[:5]:  # Максимум 5 файлов на категорию
-                filename = escape_html(file_info['url'].split('/')[-1])
-                message += f"  • <code>{filename}</code>\n"
+            by_category[file_info.get('category', 'unknown')].append(file_info)
+
+        # Вывод по категориям (сортировка нужна только при нескольких категориях)
+        categories = by_category.items()
+        if len(by_category) > 1:
+            categories = sorted(categories)
+        for category, files in categories:
+            category_emoji = get_category_emoji(category, '📦')
+            parts.append(f"{category_emoji} <b>{category.upper()}</b> ({len(files)} файлов)\n")
+
+            for file_info in islice(files, 5):  # Максимум 5 файлов на категорию
+                filename = escape_html(file_info['url'].rpartition('/')[2])
+                parts.append(f"  • <code>{filename}</code>\n")
             
             if len(files) > 5:
-                message += f"  ... и еще {len(files) - 5} файлов\n"
+                parts.append(f"  ... и еще {len(files) - 5} файлов\n")
             
-            message += "\n"
-        
-        message += "━━━━━━━━━━━━━━━━\n"
-        message += "⚠️ Требуется ручная проверка и добавление в мониторинг\n"
+            parts.append("\n")
         
-        return message
+        parts.append(DISCOVERY_REPORT_FOOTER)
+
+        return "".join(parts)
     
     def _format_version_alert(self, alert_data: Dict) -> str:
         """
@@ -665,27 +962,15 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        priority_emoji = PRIORITY_EMOJI.get(alert_data.get('priority', 'MEDIUM'), '⚪')
-        category_emoji = CATEGORY_EMOJI.get(alert_data.get('category', 'unknown'), '📦')
-        
-        message = f"""🆕 <b>НОВАЯ ВЕРСИЯ ОБНАРУЖЕНА</b>
-
-📦 Файл: <code>{escape_html(alert_data['base_name'])}</code>
-{category_emoji} Категория: <b>{escape_html(alert_data.get('category', 'unknown').upper())}</b> ({priority_emoji} {alert_data.get('priority', 'MEDIUM')})
-
-Текущая версия: {escape_html(str(alert_data.get('current_version', 'unknown')))}
-Новая версия: <b>{escape_html(str(alert_data['new_version']))}</b> ✨
-
-⚙️ Статус миграции: {escape_html(alert_data.get('migration_status', 'Автоматическая миграция запущена...'))}
-⏱ Обнаружено: {datetime.now().strftime('%Y-%m-%d %H:%M')}
-
-━━━━━━━━━━━━━━━━
-🔗 Старый URL:
-<code>{escape_html(alert_data.get('current_url', 'N/A'))}</code>
-
-🔗 Новый URL:
-<code>{escape_html(alert_data['new_url'])}</code>
-"""
+        category = alert_data.get('category', 'unknown')
+        priority = alert_data.get('priority', 'MEDIUM')
+        message = render_template('version_alert', {
+            **alert_data,
+            'now': format_now('%Y-%m-%d %H:%M'),
+            'priority_emoji': get_priority_emoji(priority, '⚪'),
+            'category_emoji': get_category_emoji(category, '📦'),
+            'category_upper': category.upper(),
+        })
         return message
     
     def _format_migration_success(self, migration_data: Dict) -> str:
@@ -698,21 +983,13 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        category_emoji = CATEGORY_EMOJI.get(migration_data.get('category', 'unknown'), '📦')
-        
-        message = f"""✅ <b>МИГРАЦИЯ ЗАВЕРШЕНА</b>
-
-📦 Файл: <code>{escape_html(migration_data['base_name'])}</code>
-{category_emoji} Категория: <b>{escape_html(migration_data.get('category', 'unknown').upper())}</b>
-
-{escape_html(str(migration_data.get('old_version', 'unknown')))} → <b>{escape_html(str(migration_data['new_version']))}</b>
-
-⏱ Время миграции: {migration_data.get('migration_time', 0):.2f}с
-✅ Статус: Активна и отслеживается
-
-━━━━━━━━━━━━━━━━
-📝 Файл автоматически обновлен и добавлен в мониторинг
-"""
+        category = migration_data.get('category', 'unknown')
+        message = render_template('migration_success', {
+            **migration_data,
+            'category_emoji': get_category_emoji(category, '📦'),
+            'category_upper': category.upper(),
+            'migration_time': f"{migration_data.get('migration_time', 0):.2f}",
+        })
         return message
     
     def _format_migration_failure(self, migration_data: Dict) -> str:
@@ -725,21 +1002,12 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        category_emoji = CATEGORY_EMOJI.get(migration_data.get('category', 'unknown'), '📦')
-        
-        message = f"""❌ <b>МИГРАЦИЯ НЕ УДАЛАСЬ</b>
-
-📦 Файл: <code>{escape_html(migration_data['base_name'])}</code>
-{category_emoji} Категория: <b>{escape_html(migration_data.get('category', 'unknown').upper())}</b>
-
-{escape_html(str(migration_data.get('old_version', 'unknown')))} → {escape_html(str(migration_data['new_version']))}
-
-❌ Ошибка: {escape_html(migration_data.get('error', 'Unknown error'))}
-🔙 Действие: Откат к предыдущей версии
-
-━━━━━━━━━━━━━━━━
-⚠️ Требуется ручная проверка!
-"""
+        category = migration_data.get('category', 'unknown')
+        message = render_template('migration_failure', {
+            **migration_data,
+            'category_emoji': get_category_emoji(category, '📦'),
+            'category_upper': category.upper(),
+        })
         return message
     
     def _format_404_critical(self, file_data: Dict) -> str:
@@ -752,25 +1020,15 @@ class TelegramNotifier:
         Returns:
             Отформатированное сообщение
         """
-        priority_emoji = PRIORITY_EMOJI.get(file_data.get('priority', 'MEDIUM'), '⚪')
-        category_emoji = CATEGORY_EMOJI.get(file_data.get('category', 'unknown'), '📦')
-        
-        message = f"""⚠️ <b>КРИТИЧЕСКАЯ ОШИБКА 404</b>
-
-📦 Файл: <code>{escape_html(file_data['base_name'])}</code>
-{category_emoji} Категория: <b>{escape_html(file_data.get('category', 'unknown').upper())}</b> ({priority_emoji} {file_data.get('priority', 'MEDIUM')})
-
-🔗 URL:
-<code>{escape_html(file_data['url'])}</code>
-
-⚠️ Последовательных 404: <b>{file_data.get('consecutive_count', 0)}</b>
-🔍 Действие: Запущен Discovery Mode для поиска замены
-
-⏱ Время: {datetime.now().strftime('%Y-%m-%d %H:%M')}
-
-━━━━━━━━━━━━━━━━
-🚨 Файл может быть удален или переименован Tilda!
-"""
+        category = file_data.get('category', 'unknown')
+        priority = file_data.get('priority', 'MEDIUM')
+        message = render_template('404_critical', {
+            **file_data,
+            'now': format_now('%Y-%m-%d %H:%M'),
+            'priority_emoji': get_priority_emoji(priority, '⚪'),
+            'category_emoji': get_category_emoji(category, '📦'),
+            'category_upper': category.upper(),
+        })
         return message
     
     def _split_long_message(self, message: str, max_len: int = 4000) -> list:
@@ -798,6 +1056,154 @@ class TelegramNotifier:
 
         return chunks
 
+    @property
+    def last_response(self) -> Optional[Dict]:
+        """Последний ответ Telegram API (разбирается из сырого тела при первом обращении)"""
+        if self._last_response is None and self._last_response_raw is not None:
+            try:
+                self._last_response = json.loads(self._last_response_raw)
+            except ValueError:
+                logger.debug("Ответ Telegram API не является JSON")
+            self._last_response_raw = None
+        return self._last_response
+
+    @last_response.setter
+    def last_response(self, value: Optional[Dict]):
+        self._last_response = value
+        self._last_response_raw = None
+
+    def _set_raw_response(self, content: bytes):
+        """Сохранить сырое тело ответа без разбора JSON"""
+        self._last_response = None
+        self._last_response_raw = content
+
+    def _payload_prefix(self, parse_mode: Optional[str], thread_id: Optional[int]) -> bytes:
+        """
+        Получить сериализованный префикс тела sendMessage (всё, кроме текста)
+
+        Args:
+            parse_mode: Режим парсинга (None — без разметки)
+            thread_id: ID топика
+
+        Returns:
+            JSON-объект без закрывающей скобки, заканчивающийся на ключ "text"
+        """
+        key = (parse_mode, thread_id)
+        prefix = self._payload_prefixes.get(key)
+        if prefix is None:
+            fields = {
+                "chat_id": self.chat_id,
+                "disable_web_page_preview": True
+            }
+            if parse_mode:
+                fields["parse_mode"] = parse_mode
+
+            # Добавить message_thread_id только если:
+            # 1. Это групповой чат (chat_id начинается с "-")
+            # 2. thread_id указан
+            if self.is_group_chat and thread_id is not None:
+                fields["message_thread_id"] = thread_id
+
+            prefix = (json.dumps(fields)[:-1] + ', "text": ').encode('ascii')
+            self._payload_prefixes[key] = prefix
+        return prefix
+
+    def _is_parse_error(self) -> bool:
+        """Последний ответ — ошибка разбора разметки (can't parse entities)"""
+        description = (self.last_response or {}).get('description') or ''
+        return 'parse entities' in str(description).lower()
+
+    def _wait_for_rate_limit(self):
+        """Подождать, если Telegram ранее ответил 429 и пауза ещё не истекла"""
+        delay = self._next_send_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _post_with_retry(self, url: str, body: bytes) -> requests.Response:
+        """
+        POST в Telegram Bot API с повторами (до SEND_MAX_ATTEMPTS попыток)
+
+        - 429: пауза по Retry-After (с джиттером вверх) до следующей попытки;
+          raise_for_status потерял бы заголовок с паузой
+        - сбой соединения: экспоненциальная пауза с джиттером
+
+        ReadTimeout не повторяется: запрос мог дойти до Telegram,
+        и повтор продублировал бы сообщение.
+
+        Returns:
+            Ответ последней попытки
+        """
+        for attempt in range(SEND_MAX_ATTEMPTS):
+            is_last = attempt == SEND_MAX_ATTEMPTS - 1
+            self._wait_for_rate_limit()
+            self._acquire_token()
+
+            try:
+                response = self._session.post(url, data=body, headers=JSON_HEADERS, timeout=10)
+            except requests.exceptions.ConnectionError as e:
+                if is_last:
+                    raise
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.9, 1.1)
+                logger.warning(f"⏳ Сбой соединения с Telegram ({type(e).__name__}), повтор через {delay:.1f}с")
+                time.sleep(delay)
+                continue
+
+            if response.status_code != 429 or is_last:
+                return response
+
+            retry_after = self._retry_after_seconds(response) * random.uniform(1.0, 1.3)
+            logger.warning(f"⏳ Telegram rate limit (429), повтор через {retry_after:.1f}с")
+            self._next_send_at = time.monotonic() + retry_after
+
+    def _acquire_token(self):
+        """
+        Взять токен из bucket'ов чата и бота, при нехватке — подождать
+
+        Локальная пауза дешевле, чем запрос, который Telegram отклонит с 429.
+        """
+        self._take_token(('chat', self.chat_id), self.per_chat_rps, 1.0)
+        self._take_token(('bot', self.bot_token), BOT_MAX_RPS, BOT_MAX_RPS)
+
+    @classmethod
+    def _take_token(cls, key: tuple, rate: float, capacity: float):
+        """
+        Взять один токен из bucket'а (пополняется со скоростью rate в секунду)
+
+        Args:
+            key: Ключ bucket'а
+            rate: Скорость пополнения (токенов в секунду)
+            capacity: Максимум токенов
+        """
+        # Токен резервируется под блокировкой (баланс может уйти в минус — это
+        # очередь ожидающих), а спим уже без неё, чтобы не задерживать другие чаты
+        with cls._BUCKETS_LOCK:
+            now = time.monotonic()
+            tokens, refilled_at = cls._BUCKETS.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - refilled_at) * rate) - 1.0
+            cls._BUCKETS[key] = (tokens, now)
+
+        if tokens < 0.0:
+            time.sleep(-tokens / rate)
+
+    def _retry_after_seconds(self, response) -> int:
+        """
+        Определить паузу из ответа 429
+
+        Args:
+            response: Ответ requests со статусом 429
+
+        Returns:
+            Пауза в секундах (от 1 до MAX_RETRY_AFTER)
+        """
+        try:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is None:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+            retry_after = int(retry_after)
+        except (TypeError, ValueError):
+            retry_after = 1
+        return min(max(retry_after, 1), MAX_RETRY_AFTER)
+
     def _send_message(self, message: str, parse_mode: str = "HTML", thread_id: int = None) -> bool:
         """
         Отправить сообщение через Telegram Bot API
@@ -816,44 +1222,47 @@ class TelegramNotifier:
             return False
 
         try:
-            import requests
+            url = self._send_url
 
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+            # Логировать с санитизацией токена (санитизация — только при включённом DEBUG)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Отправка POST запроса: %s", sanitize_url_for_logging(url))
 
-            # Логировать с санитизацией токена
-            logger.debug(f"Отправка POST запроса: {sanitize_url_for_logging(url)}")
+            if self.is_group_chat and thread_id is not None:
+                logger.debug("Отправка в топик: thread_id=%s", thread_id)
 
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "disable_web_page_preview": True
-            }
-            if parse_mode:
-                payload["parse_mode"] = parse_mode
+            # ensure_ascii=True (как в requests): валидный JSON для любой str,
+            # включая одиночные суррогаты, которые не кодируются в UTF-8
+            body = (
+                self._payload_prefix(parse_mode, thread_id)
+                + json.dumps(message).encode('ascii')
+                + b'}'
+            )
 
-            # Добавить message_thread_id только если:
-            # 1. Это групповой чат (chat_id начинается с "-")
-            # 2. thread_id указан
-            if self.is_group_chat and thread_id is not None:
-                payload["message_thread_id"] = thread_id
-                logger.debug(f"Отправка в топик: thread_id={thread_id}")
+            response = self._post_with_retry(url, body)
 
-            response = requests.post(url, json=payload, timeout=10)
+            # Сохранить последний ответ (JSON разбирается при обращении к last_response)
+            content = response.content
+            self._set_raw_response(content)
 
-            # Сохранить последний ответ
-            result = response.json()
-            self.last_response = result
+            # Разметка не разобрана Telegram — одна повторная отправка простым текстом
+            if response.status_code == 400 and parse_mode and self._is_parse_error():
+                logger.warning(f"⚠️ Telegram не разобрал разметку ({self.last_response.get('description')}), "
+                               f"повтор без parse_mode")
+                return self._send_message(html_to_plain_text(message), parse_mode=None, thread_id=thread_id)
 
             response.raise_for_status()
 
-            if result.get('ok'):
+            # Успешный ответ Telegram начинается с {"ok":true — полный разбор не нужен
+            if b'"ok":true' in content[:32]:
                 thread_info = f", thread_id={thread_id}" if self.is_group_chat and thread_id else ""
-                message_id = result.get('result', {}).get('message_id', 'N/A')
-                logger.info(f"✅ Сообщение отправлено в Telegram (chat_id: {self.chat_id}{thread_info}, msg_id: {message_id})")
-                logger.debug(f"   Response: {result}")
+                logger.info(f"✅ Сообщение отправлено в Telegram (chat_id: {self.chat_id}{thread_info})")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("   Response: %s", self.last_response)
                 self.last_error = None
                 return True
             else:
+                result = self.last_response or {}
                 error_desc = result.get('description', 'Unknown error')
                 error_code = result.get('error_code', 'N/A')
                 self.last_error = f"[{error_code}] {error_desc}"
@@ -881,6 +1290,9 @@ class TelegramNotifier:
     def test_connection(self) -> bool:
         """
         Проверить соединение с Telegram
+
+        Успешный результат кэшируется на CONNECTION_CHECK_TTL секунд:
+        повторные вызовы в этот период не делают getMe и не шлют тестовое сообщение.
         
         Returns:
             True если соединение работает
@@ -888,13 +1300,15 @@ class TelegramNotifier:
         if not self.enabled:
             logger.error("❌ Telegram не настроен (отсутствует bot_token или chat_id)")
             return False
+
+        if self._last_ok_at is not None and time.monotonic() - self._last_ok_at < CONNECTION_CHECK_TTL:
+            logger.debug("Соединение с Telegram проверено недавно, пропускаем проверку")
+            return True
         
         try:
-            import requests
-            
             # Проверка токена бота
             url = f"https://api.telegram.org/bot{self.bot_token}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             response.raise_for_status()
             
             result = response.json()
@@ -910,6 +1324,7 @@ class TelegramNotifier:
 
                 if self._send_message(test_message, thread_id=self.thread_id):
                     logger.info(f"✅ Chat ID {self.chat_id} доступен для отправки сообщений")
+                    self._last_ok_at = time.monotonic()
                     return True
                 else:
                     logger.error(f"❌ Не удалось отправить тестовое сообщение в chat_id: {self.chat_id}")
@@ -936,30 +1351,21 @@ def create_notifier() -> TelegramNotifier:
     """
     import os
 
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    env = os.environ
 
-    # Получить thread_id из переменных окружения (опционально)
-    thread_id = os.getenv('TELEGRAM_THREAD_ID')
-    alerts_thread_id = os.getenv('TELEGRAM_ALERTS_THREAD_ID')
-    digest_thread_id = os.getenv('TELEGRAM_DIGEST_THREAD_ID')
-    discovery_thread_id = os.getenv('TELEGRAM_DISCOVERY_THREAD_ID')
-
-    # Конвертировать в int если указаны
-    thread_id = int(thread_id) if thread_id else None
-    alerts_thread_id = int(alerts_thread_id) if alerts_thread_id else None
-    digest_thread_id = int(digest_thread_id) if digest_thread_id else None
-    discovery_thread_id = int(discovery_thread_id) if discovery_thread_id else None
+    def _int(key: str) -> Optional[int]:
+        """Прочитать необязательный числовой thread_id из окружения"""
+        value = env.get(key)
+        return int(value) if value else None
 
     return TelegramNotifier(
-        bot_token=bot_token,
-        chat_id=chat_id,
-        thread_id=thread_id,
-        alerts_thread_id=alerts_thread_id,
-        digest_thread_id=digest_thread_id,
-        discovery_thread_id=discovery_thread_id
+        bot_token=env.get('TELEGRAM_BOT_TOKEN'),
+        chat_id=env.get('TELEGRAM_CHAT_ID'),
+        thread_id=_int('TELEGRAM_THREAD_ID'),
+        alerts_thread_id=_int('TELEGRAM_ALERTS_THREAD_ID'),
+        digest_thread_id=_int('TELEGRAM_DIGEST_THREAD_ID'),
+        discovery_thread_id=_int('TELEGRAM_DISCOVERY_THREAD_ID')
     )
 
-
 notifier = create_notifier()
 
@@ -3,14 +3,52 @@
 """
 import logging
 import re
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse
+import sys
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import uses_params
 from packaging import version as pkg_version
 
 from src.database import db, TrackedFile, DiscoveredFile
 
 logger = logging.getLogger(__name__)
 
+# Допустимые символы схемы URL (как в urllib.parse)
+SCHEME_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.'
+
+# Управляющие символы C0 и пробел, которые urlsplit срезает в начале URL (WHATWG)
+URL_LEADING_STRIP_CHARS = ''.join(map(chr, range(0x21)))
+
+# Символы, которые urlsplit удаляет из любого места URL
+URL_UNSAFE_CHARS = ('\t', '\r', '\n')
+
+# Порядок сортировки приоритетов (меньше — важнее)
+PRIORITY_ORDER = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+
+# Кэшированный разбор версий: одни и те же строки версий разбираются многократно
+_parse_ver = lru_cache(maxsize=4096)(pkg_version.parse)
+
+# Метка для файлов без версии и её ключ сортировки (разбирается один раз)
+UNKNOWN_VERSION_LABEL = 'unknown'
+_UNKNOWN_VERSION = pkg_version.parse('0.0')
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """
+    Интернировать строку из небольшого словаря (base_name, category, priority)
+    
+    Интернированные ключи словарей сравниваются по указателю, без memcmp.
+    
+    Args:
+        value: Строка или None
+        
+    Returns:
+        Интернированная строка или None
+    """
+    return sys.intern(value) if value is not None else None
+
 
 class VersionDetector:
     """Класс для обнаружения новых версий файлов"""
@@ -31,7 +69,7 @@ class VersionDetector:
         """Инициализация детектора версий"""
         pass
     
-    def parse_file_url(self, url: str) -> Dict[str, Optional[str]]:
+    def parse_file_url(self, url: str) -> Mapping[str, Optional[str]]:
         """
         Парсинг URL для извлечения базового имени и версии
         
@@ -39,44 +77,9 @@ class VersionDetector:
             url: URL файла
             
         Returns:
-            Словарь с ключами: base_name, version, file_type, domain, full_url
+            Неизменяемый словарь с ключами: base_name, version, file_type, domain, full_url
         """
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        path = parsed_url.path
-        filename = path.split('/')[-1]
-        
-        result = {
-            'base_name': None,
-            'version': None,
-            'file_type': None,
-            'domain': domain,
-            'full_url': url,
-            'filename': filename
-        }
-        
-        # Попробовать все паттерны
-        for pattern in self.VERSION_PATTERNS:
-            match = re.search(pattern, filename)
-            if match:
-                groups = match.groupdict()
-                result['base_name'] = groups.get('base')
-                result['version'] = groups.get('version', None)
-                result['file_type'] = groups.get('ext')
-                
-                logger.debug(f"Parsed {filename}: base='{result['base_name']}', version='{result['version']}'")
-                return result
-        
-        # Если ничего не совпало, попытка извлечь хотя бы базовое имя
-        if filename.endswith('.js'):
-            result['base_name'] = filename.replace('.min.js', '').replace('.js', '')
-            result['file_type'] = 'js'
-        elif filename.endswith('.css'):
-            result['base_name'] = filename.replace('.min.css', '').replace('.css', '')
-            result['file_type'] = 'css'
-        
-        logger.debug(f"Fallback parse for {filename}: base='{result['base_name']}', no version")
-        return result
+        return _parse_file_url_cached(url)
     
     def compare_versions(self, version1: str, version2: str) -> int:
         """
@@ -91,33 +94,7 @@ class VersionDetector:
              0 если version1 == version2
              1 если version1 > version2
         """
-        if version1 is None and version2 is None:
-            return 0
-        if version1 is None:
-            return -1
-        if version2 is None:
-            return 1
-        
-        try:
-            v1 = pkg_version.parse(version1)
-            v2 = pkg_version.parse(version2)
-            
-            if v1 < v2:
-                return -1
-            elif v1 > v2:
-                return 1
-            else:
-                return 0
-                
-        except Exception as e:
-            logger.warning(f"Ошибка при сравнении версий '{version1}' и '{version2}': {e}")
-            # Fallback на строковое сравнение
-            if version1 < version2:
-                return -1
-            elif version1 > version2:
-                return 1
-            else:
-                return 0
+        return _compare_versions_cached(version1, version2)
     
     def is_newer_version(self, current_version: str, new_version: str) -> bool:
         """
@@ -151,53 +128,173 @@ class VersionDetector:
             - priority
             - category
         """
+        updates, _ = self._scan_discovered_files(tracked_files, discovered_files, collect_new_files=False)
+        return updates
+    
+    def find_version_updates_in_db(self) -> List[Dict]:
+        """
+        Найти обновления версий, сопоставляя файлы по base_name на стороне БД
+        
+        В отличие от find_version_updates, не загружает все отслеживаемые и
+        обнаруженные файлы: БД возвращает только пары с совпадающим base_name,
+        здесь остаётся выбрать для каждого обнаруженного файла отслеживаемый
+        того же типа (как в _scan_discovered_files) и сравнить версии.
+        
+        Returns:
+            Список словарей с информацией об обновлениях (как в find_version_updates)
+        """
+        parse = self.parse_file_url
+        is_newer = self.is_newer_version
+        
+        # Один кандидат на обнаруженный файл: отслеживаемый файл того же типа,
+        # при нескольких — с самой новой версией (как в _scan_discovered_files)
+        chosen = {}
+        for base_name, file_type, current_version, current_url, priority, category, new_url in \
+                db.find_version_update_candidates():
+            if parse(new_url)['file_type'] != file_type:
+                continue
+            previous = chosen.get(new_url)
+            if previous is None or is_newer(previous[1], current_version):
+                chosen[new_url] = (base_name, current_version, current_url, priority, category)
+        
         updates = []
+        append = updates.append
+        make_update = self._make_update
         
-        # Создать индекс отслеживаемых файлов по base_name
-        tracked_index = {}
-        for tf in tracked_files:
-            if not tf.base_name:
-                # Если base_name не установлено, парсим URL
-                parsed = self.parse_file_url(tf.url)
-                tf.base_name = parsed['base_name']
+        for new_url, (base_name, current_version, current_url, priority, category) in chosen.items():
+            parsed = parse(new_url)
+            new_version = parsed['version']
+            
+            if new_version and is_newer(current_version, new_version):
+                append(make_update(base_name, current_version, current_url,
+                                   priority, category, new_url, parsed))
+        
+        return updates
+    
+    def _make_update(self, base_name: str, current_version: Optional[str], current_url: str,
+                     priority: Optional[str], category: Optional[str], new_url: str,
+                     parsed: Mapping[str, Optional[str]]) -> Dict:
+        """
+        Сформировать запись об обновлении версии и записать её в лог
+        
+        Args:
+            base_name: Базовое имя файла
+            current_version: Текущая версия отслеживаемого файла
+            current_url: URL отслеживаемого файла
+            priority: Приоритет отслеживаемого файла
+            category: Категория отслеживаемого файла
+            new_url: URL обнаруженного файла
+            parsed: Результат parse_file_url для new_url
+            
+        Returns:
+            Словарь с информацией об обновлении
+        """
+        new_version = parsed['version']
+        logger.info(
+            f"🆕 Найдено обновление: {base_name} "
+            f"{current_version or UNKNOWN_VERSION_LABEL} -> {new_version}"
+        )
+        return {
+            'base_name': base_name,
+            'current_version': current_version or UNKNOWN_VERSION_LABEL,
+            'current_url': current_url,
+            'new_version': new_version,
+            'new_url': new_url,
+            'priority': _intern(priority),
+            'category': _intern(category),
+            'file_type': parsed['file_type'],
+            'domain': parsed['domain']
+        }
+    
+    def _scan_discovered_files(self, tracked_files: List[TrackedFile],
+                               discovered_files: List[DiscoveredFile],
+                               collect_new_files: bool = True) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Один проход по обнаруженным файлам: обновления версий и новые файлы
+        
+        Args:
+            tracked_files: Список отслеживаемых файлов
+            discovered_files: Список обнаруженных файлов
+            collect_new_files: Собирать ли файлы, не имеющие соответствий в tracked
             
-            if tf.base_name and tf.is_active:
-                tracked_index[tf.base_name] = tf
+        Returns:
+            Кортеж (обновления версий, новые файлы)
+        """
+        updates = []
+        new_files = []
+        
+        # Создать индекс активных отслеживаемых файлов по (base_name, тип файла):
+        # js и css одного компонента делят base_name, сравнивать их между собой нельзя.
+        # При нескольких активных файлах с одним ключом (legacy-версия рядом с
+        # актуальной) сравнение идёт с самой новой версией.
+        # (ORM-объекты не изменяются: если base_name не установлено, берём его из URL)
+        base_name_of = self._tracked_base_name
+        is_newer = self.is_newer_version
+        tracked_names = [(base_name_of(tf), tf) for tf in tracked_files]
+        tracked_index = {}
+        for base_name, tf in tracked_names:
+            if base_name and tf.is_active:
+                key = (base_name, tf.file_type)
+                previous = tracked_index.get(key)
+                if previous is None or is_newer(previous.version, tf.version):
+                    tracked_index[key] = tf
+        active_base_names = {base_name for base_name, _ in tracked_index}
+        tracked_base_names = {base_name for base_name, _ in tracked_names if base_name}
+        
+        # Локальные имена вместо поиска атрибутов на каждой итерации
+        parse = self.parse_file_url
+        get_tracked = tracked_index.get
+        append = updates.append
+        append_new = new_files.append
+        make_update = self._make_update
         
-        # Проверить обнаруженные файлы на наличие новых версий
         for df in discovered_files:
-            parsed = self.parse_file_url(df.url)
-            base_name = parsed['base_name']
-            new_version = parsed['version']
+            url = df.url
+            # base_name сохраняется при обнаружении: полный разбор URL нужен
+            # только для файлов, чья база отслеживается, или для новых файлов
+            base_name = df.base_name or parse(url)['base_name']
             
             if not base_name:
                 continue
             
-            # Проверить, есть ли этот файл в отслеживаемых
-            if base_name in tracked_index:
-                tracked_file = tracked_index[base_name]
+            # Проверить, есть ли этот файл (того же типа) в отслеживаемых
+            if base_name in active_base_names:
+                parsed = parse(url)
+                tracked_file = get_tracked((base_name, parsed['file_type']))
+                if tracked_file is None:
+                    continue
+                new_version = parsed['version']
                 current_version = tracked_file.version
                 
                 # Если у обнаруженного файла есть версия и она новее
-                if new_version and self.is_newer_version(current_version, new_version):
-                    updates.append({
-                        'base_name': base_name,
-                        'current_version': current_version or 'unknown',
-                        'current_url': tracked_file.url,
-                        'new_version': new_version,
-                        'new_url': df.url,
-                        'priority': tracked_file.priority,
-                        'category': tracked_file.category,
-                        'file_type': parsed['file_type'],
-                        'domain': parsed['domain']
-                    })
-                    
-                    logger.info(
-                        f"🆕 Найдено обновление: {base_name} "
-                        f"{current_version or 'unknown'} -> {new_version}"
-                    )
+                if new_version and is_newer(current_version, new_version):
+                    append(make_update(base_name, current_version, tracked_file.url,
+                                       tracked_file.priority, tracked_file.category, url, parsed))
+            elif collect_new_files and base_name not in tracked_base_names:
+                append_new({
+                    'base_name': base_name,
+                    'version': parse(url)['version'] or UNKNOWN_VERSION_LABEL,
+                    'url': url,
+                    'suggested_category': df.suggested_category,
+                    'source_page': df.source_page
+                })
         
-        return updates
+        return updates, new_files
+    
+    def _tracked_base_name(self, tracked_file: TrackedFile) -> Optional[str]:
+        """
+        Базовое имя отслеживаемого файла (из БД или, если не заполнено, из URL)
+        
+        base_name заполняется при старте (Database.backfill_tracked_base_names),
+        разбор URL остаётся запасным вариантом для файлов, добавленных после старта.
+        
+        Args:
+            tracked_file: Отслеживаемый файл
+            
+        Returns:
+            Базовое имя или None
+        """
+        return _intern(tracked_file.base_name or self.parse_file_url(tracked_file.url)['base_name'])
     
     def get_all_versions_for_base(self, base_name: str) -> List[Dict]:
         """
@@ -216,7 +313,7 @@ class VersionDetector:
         if tracked_file:
             versions.append({
                 'base_name': base_name,
-                'version': tracked_file.version or 'unknown',
+                'version': tracked_file.version or UNKNOWN_VERSION_LABEL,
                 'url': tracked_file.url,
                 'is_active': True,
                 'category': tracked_file.category,
@@ -239,7 +336,7 @@ class VersionDetector:
         
         # Сортировать по версии (новые сверху)
         versions.sort(
-            key=lambda x: pkg_version.parse(x['version']) if x['version'] != 'unknown' else pkg_version.parse('0.0'),
+            key=lambda x: _parse_ver(x['version']) if x['version'] != UNKNOWN_VERSION_LABEL else _UNKNOWN_VERSION,
             reverse=True
         )
         
@@ -278,7 +375,7 @@ class VersionDetector:
     
     def _calculate_similarity(self, str1: str, str2: str) -> float:
         """
-        Вычислить простую метрику схожести строк (Levenshtein-подобная)
+        Вычислить схожесть строк как коэффициент Жаккара по множествам биграмм
         
         Args:
             str1: Первая строка
@@ -289,20 +386,13 @@ class VersionDetector:
         """
         if not str1 or not str2:
             return 0.0
+        if str1 == str2:
+            return 1.0
         
-        # Простая метрика: количество общих подстрок
-        longer = str1 if len(str1) >= len(str2) else str2
-        shorter = str2 if len(str1) >= len(str2) else str1
-        
-        # Подсчитать общие символы в правильном порядке
-        matches = 0
-        j = 0
-        for i, char in enumerate(shorter):
-            if j < len(longer) and char == longer[j]:
-                matches += 1
-                j += 1
-        
-        return matches / len(longer)
+        # Пересечение и объединение множеств выполняются в C, без цикла по символам
+        bigrams1 = {str1[i:i + 2] for i in range(len(str1) - 1)}
+        bigrams2 = {str2[i:i + 2] for i in range(len(str2) - 1)}
+        return len(bigrams1 & bigrams2) / max(len(bigrams1 | bigrams2), 1)
     
     def analyze_discovered_files(self) -> Dict[str, List]:
         """
@@ -317,24 +407,8 @@ class VersionDetector:
         tracked_files = db.get_active_tracked_files()
         discovered_files = db.get_undiscovered_files()
         
-        version_updates = self.find_version_updates(tracked_files, discovered_files)
-        
-        # Определить новые файлы (не имеющие соответствий в tracked)
-        tracked_base_names = {tf.base_name for tf in tracked_files if tf.base_name}
-        
-        new_files = []
-        for df in discovered_files:
-            parsed = self.parse_file_url(df.url)
-            base_name = parsed['base_name']
-            
-            if base_name and base_name not in tracked_base_names:
-                new_files.append({
-                    'base_name': base_name,
-                    'version': parsed['version'] or 'unknown',
-                    'url': df.url,
-                    'suggested_category': df.suggested_category,
-                    'source_page': df.source_page
-                })
+        # Обновления версий и новые файлы (не имеющие соответствий в tracked) за один проход
+        version_updates, new_files = self._scan_discovered_files(tracked_files, discovered_files)
         
         # Анализ изменений схемы (требует дополнительной логики)
         schema_changes = []
@@ -352,40 +426,213 @@ class VersionDetector:
             logger.info("📭 Обновлений версий не обнаружено")
             return
         
-        logger.info(f"\n{'='*80}")
-        logger.info(f"📋 ОТЧЕТ ОБ ОБНОВЛЕНИЯХ ВЕРСИЙ")
-        logger.info(f"{'='*80}")
-        logger.info(f"Обнаружено обновлений: {len(updates)}\n")
+        # Строки отчёта собираются в одно сообщение на блок, а не logger.info на строку
+        logger.info(
+            f"\n{'='*80}\n"
+            f"📋 ОТЧЕТ ОБ ОБНОВЛЕНИЯХ ВЕРСИЙ\n"
+            f"{'='*80}\n"
+            f"Обнаружено обновлений: {len(updates)}\n"
+        )
         
         # Группировка по категориям
-        by_category = {}
+        by_category = defaultdict(list)
         for update in updates:
-            cat = update['category']
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(update)
+            by_category[update['category']].append(update)
         
         # Вывести по категориям с приоритетами
-        priority_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+        priority_rank = PRIORITY_ORDER.get
         sorted_categories = sorted(
             by_category.items(),
-            key=lambda x: priority_order.get(updates[0]['priority'], 99)
+            key=lambda item: priority_rank(item[1][0]['priority'], 99)
         )
         
         for category, cat_updates in sorted_categories:
             priority = cat_updates[0]['priority']
-            logger.info(f"📁 Категория: {category} (Приоритет: {priority}) - {len(cat_updates)} обновлений")
+            lines = [f"📁 Категория: {category} (Приоритет: {priority}) - {len(cat_updates)} обновлений"]
             
             for update in cat_updates:
-                logger.info(f"   🆕 {update['base_name']}")
-                logger.info(f"      Текущая: {update['current_version']}")
-                logger.info(f"      Новая: {update['new_version']} ✨")
-                logger.info(f"      URL: {update['new_url']}")
-            logger.info("")
+                lines.append(f"   🆕 {update['base_name']}")
+                lines.append(f"      Текущая: {update['current_version']}")
+                lines.append(f"      Новая: {update['new_version']} ✨")
+                lines.append(f"      URL: {update['new_url']}")
+            lines.append("")
+            logger.info("\n".join(lines))
         
         logger.info(f"{'='*80}\n")
 
 
+def _build_combined_version_pattern(patterns: List[str]) -> Tuple[re.Pattern, Dict[str, Tuple]]:
+    """
+    Объединить паттерны версий в одно регулярное выражение с альтернативами
+    
+    Имена групп в re не могут повторяться, поэтому группы каждой альтернативы
+    получают суффикс с её номером, а сама альтернатива оборачивается в группу altN.
+    
+    Поиск по объединённому выражению возвращает самое левое совпадение среди всех
+    альтернатив; порядок паттернов решает только при совпадении с одной позиции.
+    Это не то же самое, что перебор паттернов по очереди: для искусственных имён
+    вроде 'b21-v2.css-1.07.min.css' результат отличается (base='b21', version='2'
+    вместо base='css', version='1.07'). Реальные имена файлов Tilda это не затрагивает.
+    
+    Args:
+        patterns: Список паттернов (при совпадении с одной позиции выигрывает более ранний)
+        
+    Returns:
+        Кортеж (скомпилированный паттерн, {altN: (группа base, группа version, группа ext)})
+    """
+    alternatives = []
+    groups = {}
+    for i, pattern in enumerate(patterns):
+        names = []
+        for name in ('base', 'version', 'ext'):
+            if f'(?P<{name}>' in pattern:
+                pattern = pattern.replace(f'(?P<{name}>', f'(?P<{name}{i}>')
+                names.append(f'{name}{i}')
+            else:
+                names.append(None)
+        alternatives.append(f'(?P<alt{i}>{pattern})')
+        groups[f'alt{i}'] = tuple(names)
+    return re.compile('|'.join(alternatives)), groups
+
+
+# Все паттерны версий одним выражением: один проход regex-движка на имя файла
+# (самое левое совпадение среди альтернатив, см. _build_combined_version_pattern)
+_COMBINED_VERSION_PATTERN, _VERSION_PATTERN_GROUPS = _build_combined_version_pattern(
+    VersionDetector.VERSION_PATTERNS
+)
+
+
+def split_domain_and_filename(url: str) -> Tuple[str, str]:
+    """
+    Извлечь домен и имя файла из URL без построения полного ParseResult
+    
+    Повторяет поведение urlparse(url).netloc и последнего сегмента urlparse(url).path:
+    ведущие управляющие символы и пробелы срезаются, \\t, \\r и \\n удаляются,
+    query (?...), fragment (#...) и параметры (;... для http/https) отбрасываются.
+    В отличие от urlparse, некорректный IPv6-домен не вызывает ValueError.
+    
+    Args:
+        url: URL файла
+        
+    Returns:
+        Кортеж (домен, имя файла)
+    """
+    url = url.lstrip(URL_LEADING_STRIP_CHARS)
+    for char in URL_UNSAFE_CHARS:
+        if char in url:
+            url = url.replace(char, '')
+    
+    # Схема (http:, https:) — как в urlsplit: первый символ буква, остальные из SCHEME_CHARS
+    start = 0
+    scheme = ''
+    colon = url.find(':')
+    if colon > 0 and url[0].isascii() and url[0].isalpha() and not url[:colon].strip(SCHEME_CHARS):
+        start = colon + 1
+        scheme = url[:colon].lower()
+    
+    end = url.find('#', start)
+    if end == -1:
+        end = len(url)
+    query = url.find('?', start, end)
+    if query != -1:
+        end = query
+    
+    if url.startswith('//', start):
+        path_start = url.find('/', start + 2, end)
+        if path_start == -1:
+            path_start = end
+        domain = url[start + 2:path_start]
+    else:
+        domain = ''
+        path_start = start
+    
+    filename = url[max(url.rfind('/', path_start, end) + 1, path_start):end]
+    params = filename.find(';') if scheme in uses_params else -1
+    if params != -1:
+        filename = filename[:params]
+    return domain, filename
+
+
+@lru_cache(maxsize=8192)
+def _parse_file_url_cached(url: str) -> Mapping[str, Optional[str]]:
+    """
+    Парсинг URL с кэшированием результата (URL повторяются между проверками)
+    
+    Args:
+        url: URL файла
+        
+    Returns:
+        Неизменяемый словарь с ключами: base_name, version, file_type, domain, full_url
+    """
+    domain, filename = split_domain_and_filename(url)
+    
+    result = {
+        'base_name': None,
+        'version': None,
+        'file_type': None,
+        'domain': domain,
+        'full_url': url,
+        'filename': filename
+    }
+    
+    # Проверить все паттерны одним поиском. Каждый паттерн требует ".js" или ".css"
+    # в имени файла, поэтому для остальных имён regex-движок не запускается вовсе
+    match = None
+    if '.js' in filename or '.css' in filename:
+        match = _COMBINED_VERSION_PATTERN.search(filename)
+    if match:
+        base_group, version_group, ext_group = _VERSION_PATTERN_GROUPS[match.lastgroup]
+        result['base_name'] = sys.intern(match.group(base_group))
+        result['version'] = match.group(version_group) if version_group else None
+        result['file_type'] = match.group(ext_group)
+        
+        logger.debug("Parsed %s: base='%s', version='%s'", filename, result['base_name'], result['version'])
+        return MappingProxyType(result)
+    
+    # Если ничего не совпало, попытка извлечь хотя бы базовое имя
+    if filename.endswith('.js'):
+        result['base_name'] = sys.intern(filename.replace('.min.js', '').replace('.js', ''))
+        result['file_type'] = 'js'
+    elif filename.endswith('.css'):
+        result['base_name'] = sys.intern(filename.replace('.min.css', '').replace('.css', ''))
+        result['file_type'] = 'css'
+    
+    logger.debug("Fallback parse for %s: base='%s', no version", filename, result['base_name'])
+    return MappingProxyType(result)
+
+
+@lru_cache(maxsize=4096)
+def _compare_versions_cached(version1: Optional[str], version2: Optional[str]) -> int:
+    """Кэшируемое семантическое сравнение версий (см. VersionDetector.compare_versions)"""
+    if version1 is None and version2 is None:
+        return 0
+    if version1 is None:
+        return -1
+    if version2 is None:
+        return 1
+    
+    try:
+        v1 = _parse_ver(version1)
+        v2 = _parse_ver(version2)
+        
+        if v1 < v2:
+            return -1
+        elif v1 > v2:
+            return 1
+        else:
+            return 0
+            
+    except Exception as e:
+        logger.warning(f"Ошибка при сравнении версий '{version1}' и '{version2}': {e}")
+        # Fallback на строковое сравнение
+        if version1 < version2:
+            return -1
+        elif version1 > version2:
+            return 1
+        else:
+            return 0
+
+
 # Глобальный экземпляр детектора
 detector = VersionDetector()
 
@@ -0,0 +1,68 @@
+"""
+Тесты поиска обновлений версий (src/version_detector.py)
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.database import db
+from src.version_detector import detector
+
+# Отслеживаемые файлы из config.py с общими base_name: js/css пары и legacy-версия
+TRACKED_URLS = [
+    "https://static.tildacdn.com/js/tilda-scripts-3.0.min.js",
+    "https://static.tildacdn.com/js/tilda-scripts-2.8.min.js",
+    "https://static.tildacdn.com/js/tilda-animation-1.0.min.js",
+    "https://static.tildacdn.com/js/tilda-animation-2.0.min.js",
+    "https://static.tildacdn.com/css/tilda-animation-1.0.min.css",
+    "https://static.tildacdn.com/css/tilda-animation-2.0.min.css",
+]
+
+DISCOVERED_URLS = [
+    "https://static.tildacdn.com/js/tilda-animation-3.0.min.js",
+    "https://static.tildacdn.com/js/tilda-scripts-3.1.min.js",
+]
+
+
+class FindVersionUpdatesSharedBaseNameTest(unittest.TestCase):
+    """Несколько отслеживаемых файлов с одним base_name"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_url = db.database_url
+        db.database_url = f"sqlite:///{Path(self.tmp_dir.name) / 'test.db'}"
+        self.assertTrue(db.init_db())
+
+        for url in TRACKED_URLS:
+            file_type = 'css' if url.endswith('.css') else 'js'
+            db.save_file_state(url, file_type, '', 'hash', 0)
+        for url in DISCOVERED_URLS:
+            db.save_discovered_file(url, 'test', base_name=detector.parse_file_url(url)['base_name'])
+
+    def tearDown(self):
+        db.engine.dispose()
+        db.database_url = self.original_url
+        self.tmp_dir.cleanup()
+
+    def test_sql_and_python_paths_agree(self):
+        in_db = detector.find_version_updates_in_db()
+        in_python = detector.find_version_updates(db.get_active_tracked_files(), db.get_undiscovered_files())
+
+        self.assertEqual(in_db, in_python)
+
+    def test_one_update_per_discovered_file_of_same_type(self):
+        updates = detector.find_version_updates_in_db()
+
+        self.assertEqual(sorted(u['new_url'] for u in updates), sorted(DISCOVERED_URLS))
+        for update in updates:
+            self.assertEqual(update['file_type'], 'js')
+            self.assertTrue(update['current_url'].endswith('.js'))
+
+    def test_compares_with_newest_tracked_version(self):
+        by_base = {u['base_name']: u['current_version'] for u in detector.find_version_updates_in_db()}
+
+        self.assertEqual(by_base, {'tilda-animation': '2.0', 'tilda-scripts': '3.0'})
+
+
+if __name__ == '__main__':
+    unittest.main()